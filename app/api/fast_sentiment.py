@@ -0,0 +1,289 @@
+"""Numba-accelerated batch scoring against the VADER lexicon.
+
+The lexicon is materialized once as two sorted NumPy arrays (FNV-1a hash of
+each word, and its valence) so a whole batch of tweets can be scored in a
+single JIT-compiled pass instead of one Python-level VADER call per tweet.
+If numba is not installed the caller should fall back to stock VADER -
+check ready() before using score_tweets().
+"""
+import re
+import math
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    # Words that trigger VADER's rule engine (negation flips, degree
+    # boosters, "least" pre-negation); texts containing any of these need
+    # the full analyzer. "no" is not in NEGATE but sentiment_valence zeroes
+    # it and negates a following lexicon word, so it must be gated too.
+    from vaderSentiment.vaderSentiment import BOOSTER_DICT, NEGATE, SPECIAL_CASES
+    MODIFIER_WORDS = set(NEGATE) | {w.lower() for w in BOOSTER_DICT} | {"but", "least", "no"}
+    # Multi-word boosters and idioms ("kind of", "bad ass") never match a
+    # single-token lookup, so gate on their leading bigram instead
+    MODIFIER_BIGRAMS = {tuple(w.lower().split()[:2])
+                        for w in list(BOOSTER_DICT) + list(SPECIAL_CASES)
+                        if " " in w}
+except ImportError:
+    MODIFIER_WORDS = None
+    MODIFIER_BIGRAMS = None
+
+# Cheap tokenizer matching VADER's notion of words closely enough for
+# lexicon lookups
+WORD_RE = re.compile(r"[A-Za-z0-9']+")
+
+# Anything outside plain word characters and whitespace ('!', '?', emoji,
+# every emoticon lexicon entry) can change a VADER score, so its presence
+# sends the text to the full analyzer
+NONWORD_RE = re.compile(r"[^A-Za-z0-9'\s]")
+
+_FNV_OFFSET = 14695981039346656037
+_FNV_PRIME = 1099511628211
+_UINT64_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Sorted lexicon arrays, filled in by init_lexicon()
+LEX_KEYS = None
+LEX_VALS = None
+
+# Plain dict view of the lexicon for the pure-Python fast path
+LEX = None
+
+
+def _fnv1a(word):
+    """FNV-1a hash of a word, matching the njit'd byte-level routine."""
+    h = _FNV_OFFSET
+    for b in word.encode("utf-8"):
+        h = ((h ^ b) * _FNV_PRIME) & _UINT64_MASK
+    return h
+
+
+def init_lexicon(lexicon):
+    """Build the lexicon lookup structures from a VADER lexicon dict."""
+    global LEX_KEYS, LEX_VALS, LEX
+    LEX = {w: float(v) for w, v in lexicon.items()}
+    if not NUMBA_AVAILABLE:
+        return
+    keys = np.fromiter((_fnv1a(w) for w in lexicon), dtype=np.uint64, count=len(lexicon))
+    # Valences are bounded in [-4, 4] with one decimal, so store them as
+    # int8 at a fixed x10 scale - a quarter of the float32 memory traffic
+    # in the kernel's inner loop
+    vals = np.round(np.fromiter(lexicon.values(), dtype=np.float32,
+                                count=len(lexicon)) * 10).astype(np.int8)
+    order = np.argsort(keys)
+    LEX_KEYS = np.ascontiguousarray(keys[order])
+    LEX_VALS = np.ascontiguousarray(vals[order])
+
+
+def ready():
+    return NUMBA_AVAILABLE and LEX_KEYS is not None
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _hash_tokens(data, starts, ends, out):
+        offset = np.uint64(_FNV_OFFSET)
+        prime = np.uint64(_FNV_PRIME)
+        for i in range(starts.shape[0]):
+            h = offset
+            for j in range(starts[i], ends[i]):
+                h = (h ^ np.uint64(data[j])) * prime
+            out[i] = h
+
+    @njit(parallel=True, cache=True)
+    def _score_kernel(hashes, offsets, lex_keys, lex_vals):
+        n = offsets.shape[0] - 1
+        neg = np.zeros(n, dtype=np.float32)
+        neu = np.zeros(n, dtype=np.float32)
+        pos = np.zeros(n, dtype=np.float32)
+        compound = np.zeros(n, dtype=np.float32)
+        for i in prange(n):
+            # Accumulate in integers at the lexicon's x10 scale; convert to
+            # float only for the final normalization
+            pos_sum = 0
+            neg_sum = 0
+            neu_count = 0
+            total = 0
+            for t in range(offsets[i], offsets[i + 1]):
+                idx = np.searchsorted(lex_keys, hashes[t])
+                if idx < lex_keys.shape[0] and lex_keys[idx] == hashes[t]:
+                    v = int(lex_vals[idx])
+                else:
+                    v = 0
+                # Same bookkeeping as VADER's score_valence (scaled by 10)
+                if v > 0:
+                    pos_sum += v + 10
+                elif v < 0:
+                    neg_sum += v - 10
+                else:
+                    neu_count += 1
+                total += v
+            total_f = total / 10.0
+            compound[i] = total_f / np.sqrt(total_f * total_f + 15.0)
+            denom = pos_sum + abs(neg_sum) + neu_count * 10
+            if denom > 0:
+                neg[i] = abs(neg_sum) / denom
+                neu[i] = neu_count * 10 / denom
+                pos[i] = pos_sum / denom
+            else:
+                neu[i] = 1.0
+        return neg, neu, pos, compound
+
+
+def _simple_tokens(text):
+    """Lowercased tokens when the text avoids VADER's rule constructs.
+
+    Returns None when the text needs the full rule engine: any punctuation
+    or emoticon character, caps emphasis, negations, degree modifiers, or a
+    multi-word booster/idiom.
+    """
+    if NONWORD_RE.search(text):
+        return None
+    tokens = WORD_RE.findall(text)
+    lowered = []
+    prev = None
+    for tok in tokens:
+        if len(tok) > 1 and tok.isupper():
+            return None
+        low = tok.lower()
+        if low in MODIFIER_WORDS or (prev, low) in MODIFIER_BIGRAMS:
+            return None
+        lowered.append(low)
+        prev = low
+    return lowered
+
+
+def score_simple(text):
+    """Score a tweet with one tokenizer pass and direct lexicon lookups.
+
+    Skips VADER's punctuation/capitalization/booster branches, so it only
+    applies to texts that don't use them: returns None when the text needs
+    the full rule engine and the caller should fall back to stock VADER.
+    """
+    if LEX is None or MODIFIER_WORDS is None:
+        return None
+    lowered = _simple_tokens(text)
+    if lowered is None:
+        return None
+
+    pos_sum = 0.0
+    neg_sum = 0.0
+    neu_count = 0
+    total = 0.0
+    for tok in lowered:
+        v = LEX.get(tok, 0.0)
+        if v > 0:
+            pos_sum += v + 1
+        elif v < 0:
+            neg_sum += v - 1
+        else:
+            neu_count += 1
+        total += v
+
+    compound = total / math.sqrt(total * total + 15.0)
+    denom = pos_sum + abs(neg_sum) + neu_count
+    if denom > 0:
+        return (abs(neg_sum) / denom, neu_count / denom, pos_sum / denom, compound)
+    return (0.0, 1.0, 0.0, 0.0)
+
+
+def score_tweets_numpy(tweets):
+    """NumPy-vectorized batch scoring for when numba is unavailable.
+
+    Flattens all simple tweets' token valences into one array and reduces
+    per-tweet segments with np.add.reduceat. Returns (neg, neu, pos,
+    compound, full_idx); tweets listed in full_idx contain rule constructs
+    (or the lexicon isn't loaded) and must be re-scored with stock VADER by
+    the caller - their slots hold neutral placeholders.
+    """
+    n = len(tweets)
+    neg = np.zeros(n, dtype=np.float32)
+    neu = np.ones(n, dtype=np.float32)
+    pos = np.zeros(n, dtype=np.float32)
+    compound = np.zeros(n, dtype=np.float32)
+
+    if LEX is None or MODIFIER_WORDS is None:
+        return neg, neu, pos, compound, list(range(n))
+
+    full_idx = []
+    token_lists = []
+    for i, text in enumerate(tweets):
+        tokens = _simple_tokens(text)
+        if tokens is None:
+            full_idx.append(i)
+            token_lists.append([])
+        else:
+            token_lists.append(tokens)
+
+    counts = np.fromiter((len(tl) for tl in token_lists), dtype=np.int64, count=n)
+    flat_count = int(counts.sum())
+    if flat_count:
+        vals = np.fromiter((LEX.get(tok, 0.0) for tl in token_lists for tok in tl),
+                           dtype=np.float32, count=flat_count)
+        # reduceat over only the non-empty segments; empty ones would
+        # otherwise pick up a neighbouring element
+        nz = np.flatnonzero(counts)
+        offsets = np.zeros(n, dtype=np.int64)
+        np.cumsum(counts[:-1], out=offsets[1:])
+        starts = offsets[nz]
+
+        total = np.add.reduceat(vals, starts)
+        pos_sum = np.add.reduceat(np.where(vals > 0, vals + 1, 0.0), starts)
+        neg_sum = np.add.reduceat(np.where(vals < 0, vals - 1, 0.0), starts)
+        neu_count = np.add.reduceat((vals == 0).astype(np.float32), starts)
+
+        compound[nz] = total / np.sqrt(total * total + 15.0)
+        denom = pos_sum + np.abs(neg_sum) + neu_count
+        denom[denom == 0] = 1.0
+        neg[nz] = np.abs(neg_sum) / denom
+        neu[nz] = neu_count / denom
+        pos[nz] = pos_sum / denom
+
+    return neg, neu, pos, compound, full_idx
+
+
+def score_tweets(tweets):
+    """Score a batch of tweets in one JIT-compiled pass.
+
+    Only tweets that pass the _simple_tokens gate go through the kernel -
+    the lexicon-only sums diverge from stock VADER on anything its rule
+    engine touches (negation, boosters, caps/punctuation emphasis,
+    emoticons). Returns (neg, neu, pos, compound, full_idx); tweets listed
+    in full_idx must be re-scored with stock VADER by the caller - their
+    slots hold neutral placeholders.
+    """
+    n = len(tweets)
+    if MODIFIER_WORDS is None:
+        return (np.zeros(n, dtype=np.float32), np.ones(n, dtype=np.float32),
+                np.zeros(n, dtype=np.float32), np.zeros(n, dtype=np.float32),
+                list(range(n)))
+
+    full_idx = []
+    token_lists = []
+    for i, text in enumerate(tweets):
+        tokens = _simple_tokens(text)
+        if tokens is None:
+            full_idx.append(i)
+            token_lists.append([])
+        else:
+            token_lists.append(tokens)
+    encoded = [tok.encode("utf-8") for toks in token_lists for tok in toks]
+
+    counts = np.fromiter((len(toks) for toks in token_lists), dtype=np.int64,
+                         count=len(token_lists))
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    hashes = np.empty(len(encoded), dtype=np.uint64)
+    _hash_tokens(data, starts, ends, hashes)
+    neg, neu, pos, compound = _score_kernel(hashes, offsets, LEX_KEYS, LEX_VALS)
+    return neg, neu, pos, compound, full_idx
@@ -1,41 +1,91 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional, Dict, Any
-import requests
-from pydantic import BaseModel
+import httpx
+import redis.asyncio
+import orjson
+import hashlib
+from urllib.parse import urlencode
+from pydantic import BaseModel, ConfigDict
 import os
+import re
 import time
+import asyncio
+import logging
+import numpy as np
 from dotenv import load_dotenv
-import threading
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import fireworks.client
 import datetime
 import random
-from openai import OpenAI
+import collections
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from openai import AsyncOpenAI
+import fast_sentiment
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize NLTK components
-MODEL_LOADED = False
-
-def load_model():
-    global sia, MODEL_LOADED
-    try:
-        print("Loading sentiment analysis model...")
-        nltk.download('vader_lexicon', quiet=True)
-        sia = SentimentIntensityAnalyzer()
-        MODEL_LOADED = True
-        print("Sentiment analysis model loaded successfully!")
-    except Exception as e:
-        print(f"Error loading model: {e}")
-
-# Start model loading in a separate thread
-threading.Thread(target=load_model).start()
-
-app = FastAPI(title="X API Proxy")
+logger = logging.getLogger(__name__)
+
+# Load the sentiment model synchronously at import. Instantiation is fast
+# now that the lexicon ships with vaderSentiment, and a hard failure should
+# stop the process rather than silently serve neutral results.
+try:
+    sia = SentimentIntensityAnalyzer()
+except Exception as e:
+    raise RuntimeError(f"Failed to load sentiment analysis model: {e}") from e
+
+try:
+    fast_sentiment.init_lexicon(sia.lexicon)
+except Exception as e:
+    logger.warning("Numba fast path unavailable, using stock VADER: %s", e)
+
+# Process pool for scoring large sentiment batches on all cores when the
+# numba kernel is unavailable. Workers build their own analyzer once; the
+# pool is only engaged above SENTIMENT_POOL_THRESHOLD tweets so small
+# requests don't pay the IPC overhead.
+SENTIMENT_POOL_THRESHOLD = int(os.getenv("SENTIMENT_POOL_THRESHOLD", "128"))
+SENTIMENT_POOL_CHUNK = 256
+
+def _init_worker():
+    global sia
+    sia = SentimentIntensityAnalyzer()
+
+def _score_chunk(tweets):
+    results = []
+    for text in tweets:
+        if not text.strip():
+            results.append((0.0, 1.0, 0.0, 0.0))
+            continue
+        scores = sia.polarity_scores(text)
+        results.append((scores['neg'], scores['neu'], scores['pos'], scores['compound']))
+    return results
+
+# Per-worker shared resources: the pooled httpx client for Twitter calls,
+# the optional Redis cache (skipped when REDIS_URL is unset), and the
+# sentiment scoring process pool
+@asynccontextmanager
+async def lifespan(app):
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        headers={"User-Agent": "x_orgs_analysis/1.0"},
+    )
+    redis_url = os.getenv("REDIS_URL")
+    app.state.redis = redis.asyncio.from_url(redis_url) if redis_url else None
+    app.state.pool = ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker)
+    yield
+    await app.state.http.aclose()
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
+    app.state.pool.shutdown()
+
+app = FastAPI(title="X API Proxy", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # CORS middleware to allow frontend requests
 app.add_middleware(
@@ -46,8 +96,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Security scheme for Bearer token
-security = HTTPBearer()
+# Security scheme for Bearer token; auto_error off so a missing header
+# falls through to the default token instead of raising inside the parser
+security = HTTPBearer(auto_error=False)
 
 # Twitter API base URL and credentials from environment variables
 TWITTER_API_BASE = "https://api.twitter.com/2"
@@ -62,62 +113,173 @@ FIREWORKS_API_KEY = os.getenv("FIREWORKS_API_KEY", "")
 if FIREWORKS_API_KEY:
     fireworks.client.api_key = FIREWORKS_API_KEY
 else:
-    print("WARNING: FIREWORKS_API_KEY environment variable is not set!")
+    logger.warning("FIREWORKS_API_KEY environment variable is not set!")
 
 # Print a warning if the bearer token is missing
 if not DEFAULT_BEARER_TOKEN:
-    print("WARNING: TWITTER_BEARER_TOKEN environment variable is not set!")
-
-# Models
-class PostsResponse(BaseModel):
-    data: Optional[List[Dict[str, Any]]] = None
-    meta: Optional[Dict[str, Any]] = None
-    includes: Optional[Dict[str, Any]] = None
-    errors: Optional[List[Dict[str, Any]]] = None
-
-class UserResponse(BaseModel):
-    data: Optional[Dict[str, Any]] = None
-    includes: Optional[Dict[str, Any]] = None
-    errors: Optional[List[Dict[str, Any]]] = None
+    logger.warning("TWITTER_BEARER_TOKEN environment variable is not set!")
 
 # Authentication middleware
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def verify_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
     # If a token is provided in the request, use it
-    if credentials and credentials.credentials and credentials.credentials != "dummy-token":
-        return credentials.credentials
+    token = credentials.credentials if credentials else None
+    if token and token != "dummy-token":
+        return token
     # Otherwise use the default token
     return DEFAULT_BEARER_TOKEN
 
+# Reused for the common case so the per-request f-string + dict build is
+# skipped when callers ride on the default token
+_DEFAULT_HEADERS = {"Authorization": f"Bearer {DEFAULT_BEARER_TOKEN}"}
+
+def auth_headers(token):
+    if token == DEFAULT_BEARER_TOKEN:
+        return _DEFAULT_HEADERS
+    return {"Authorization": f"Bearer {token}"}
+
+# Cap concurrent in-flight Twitter calls so bursts of clients don't trigger
+# 429 storms upstream. Keep this at or below the httpx pool size above.
+TWITTER_SEM = asyncio.Semaphore(int(os.getenv("TWITTER_MAX_CONCURRENCY", "10")))
+TWITTER_SEM_TIMEOUT = float(os.getenv("TWITTER_SEM_TIMEOUT", "30"))
+
+class TokenBucket:
+    """Paces requests below a fixed rate, refilling lazily on acquire."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def clamp(self, remaining):
+        # Keep our local view at or below what the API says is left in the
+        # current window
+        self.tokens = min(self.tokens, remaining)
+
+# Proactive throttles sized to Twitter v2 app-auth limits (requests per
+# 15-minute window), so we pace ourselves instead of burning a round-trip
+# on a 429 and sleeping out the retry-after
+BUCKETS = {
+    "users/by/username": TokenBucket(300 / 900, 300),
+    "users/tweets": TokenBucket(1500 / 900, 1500),
+    "tweets/liking_users": TokenBucket(75 / 900, 75),
+}
+
 # Add this function to handle rate limits
-def make_twitter_request(url, headers, params, max_retries=3):
+async def make_twitter_request(url, headers, params, max_retries=3, bucket_key=None):
     """Make a request to Twitter API with retry logic for rate limits"""
+    bucket = BUCKETS.get(bucket_key)
+    if bucket is not None:
+        await bucket.acquire()
+    try:
+        await asyncio.wait_for(TWITTER_SEM.acquire(), timeout=TWITTER_SEM_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {"errors": [{"detail": "Timed out waiting for an upstream request slot"}]}
+    try:
+        return await _twitter_request_with_retries(url, headers, params, max_retries, bucket)
+    finally:
+        TWITTER_SEM.release()
+
+def _retry_after(response):
+    try:
+        return int(response.headers.get('retry-after', 60))
+    except ValueError:
+        return 60
+
+def _sync_bucket(bucket, response):
+    if bucket is None:
+        return
+    remaining = response.headers.get("x-rate-limit-remaining")
+    if remaining is not None:
+        try:
+            bucket.clamp(int(remaining))
+        except ValueError:
+            pass
+
+async def _twitter_request_with_retries(url, headers, params, max_retries, bucket=None):
     for attempt in range(max_retries):
         try:
-            response = requests.get(url, headers=headers, params=params)
-            
+            response = await app.state.http.get(url, headers=headers, params=params)
+            _sync_bucket(bucket, response)
+
             # If we get a rate limit error, wait and retry
             if response.status_code == 429:
-                retry_after = int(response.headers.get('retry-after', 60))
-                print(f"Rate limited. Waiting {retry_after} seconds before retrying...")
-                time.sleep(retry_after)
+                retry_after = _retry_after(response)
+                logger.warning("Rate limited. Waiting %d seconds before retrying...", retry_after)
+                await asyncio.sleep(retry_after)
                 continue
-                
+
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            if hasattr(e, 'response') and e.response is not None:
-                if e.response.status_code == 429 and attempt < max_retries - 1:
-                    retry_after = int(e.response.headers.get('retry-after', 60))
-                    print(f"Rate limited. Waiting {retry_after} seconds before retrying...")
-                    time.sleep(retry_after)
-                    continue
-                return e.response.json()
-            raise
-    
+            return orjson.loads(response.content)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429 and attempt < max_retries - 1:
+                retry_after = _retry_after(e.response)
+                logger.warning("Rate limited. Waiting %d seconds before retrying...", retry_after)
+                await asyncio.sleep(retry_after)
+                continue
+            return orjson.loads(e.response.content)
+
     # If we've exhausted retries
     return {"errors": [{"detail": "Maximum retries exceeded due to rate limits"}]}
 
-@app.get("/users/by/username/{username}", response_model=UserResponse)
+# Assemble Twitter query params in one pass: drop unset values and join
+# list-valued fields with commas
+def build_params(items):
+    return {k: ",".join(v) if isinstance(v, list) else v
+            for k, v in items.items() if v is not None}
+
+# How long cached Twitter responses stay fresh
+CACHE_TTL = int(os.getenv("TWITTER_CACHE_TTL", "60"))
+
+def _cache_key(url, params):
+    query = urlencode(sorted(params.items()))
+    return "tw:" + hashlib.blake2b(f"{url}?{query}".encode(), digest_size=16).hexdigest()
+
+async def cached_twitter_get(url, headers, params, bucket_key=None):
+    """make_twitter_request with a short-lived Redis cache in front of it.
+
+    Returns a ready-to-send Response on a cache hit (the stored bytes go
+    straight back out with no parse/serialize step), otherwise the parsed
+    dict from the live request.
+    """
+    cache = app.state.redis
+    if cache is None:
+        return await make_twitter_request(url, headers, params, bucket_key=bucket_key)
+
+    key = _cache_key(url, params)
+    try:
+        cached = await cache.get(key)
+    except Exception as e:
+        logger.warning("Redis get failed: %s", e)
+        cached = None
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    result = await make_twitter_request(url, headers, params, bucket_key=bucket_key)
+
+    # Only cache successful lookups - never error or rate-limit bodies
+    if isinstance(result, dict) and "errors" not in result:
+        try:
+            await cache.set(key, orjson.dumps(result), ex=CACHE_TTL)
+        except Exception as e:
+            logger.warning("Redis set failed: %s", e)
+
+    return result
+
+@app.get("/users/by/username/{username}")
 async def get_user_by_username(
     username: str,
     token: str = Depends(verify_token),
@@ -128,26 +290,27 @@ async def get_user_by_username(
     """
     Lookup a Twitter user by username using the real Twitter API
     """
-    print(f"Looking up user: {username}")
+    logger.info("Looking up user: %s", username)
     
     # Build query parameters
-    params = {}
-    if user_fields:
-        params["user.fields"] = ",".join(user_fields)
-    if expansions:
-        params["expansions"] = ",".join(expansions)
-    if tweet_fields:
-        params["tweet.fields"] = ",".join(tweet_fields)
-    
+    params = build_params({
+        "user.fields": user_fields,
+        "expansions": expansions,
+        "tweet.fields": tweet_fields,
+    })
+
     # Make request to Twitter API
     url = f"{TWITTER_API_BASE}/users/by/username/{username}"
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = auth_headers(token)
     
-    result = make_twitter_request(url, headers, params)
-    print(f"User lookup result: {result}")
-    return result
+    result = await cached_twitter_get(url, headers, params, bucket_key="users/by/username")
+    if isinstance(result, Response):
+        return result
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("User lookup result: %s", result)
+    return ORJSONResponse(result)
 
-@app.get("/users/{id}/tweets", response_model=PostsResponse)
+@app.get("/users/{id}/tweets")
 async def get_user_posts(
     id: str,
     token: str = Depends(verify_token),
@@ -168,182 +331,265 @@ async def get_user_posts(
     """
     Get tweets for a user using the Twitter API
     """
-    print(f"Fetching tweets for user ID: {id}")
-    print(f"Parameters: max_results={max_results}, exclude={exclude}")
+    logger.info("Fetching tweets for user ID: %s", id)
+    logger.debug("Parameters: max_results=%s, exclude=%s", max_results, exclude)
     
     # Build query parameters
-    params = {}
-    if since_id:
-        params["since_id"] = since_id
-    if until_id:
-        params["until_id"] = until_id
-    if max_results:
-        params["max_results"] = max_results
-    if pagination_token:
-        params["pagination_token"] = pagination_token
-    if exclude:
-        params["exclude"] = ",".join(exclude)
-    if start_time:
-        params["start_time"] = start_time
-    if end_time:
-        params["end_time"] = end_time
-    if tweet_fields:
-        params["tweet.fields"] = ",".join(tweet_fields)
-        print(f"Requesting tweet fields: {params['tweet.fields']}")
-    if expansions:
-        params["expansions"] = ",".join(expansions)
-    if media_fields:
-        params["media.fields"] = ",".join(media_fields)
-    if poll_fields:
-        params["poll.fields"] = ",".join(poll_fields)
-    if user_fields:
-        params["user.fields"] = ",".join(user_fields)
-    if place_fields:
-        params["place.fields"] = ",".join(place_fields)
-    
+    params = build_params({
+        "since_id": since_id,
+        "until_id": until_id,
+        "max_results": max_results,
+        "pagination_token": pagination_token,
+        "exclude": exclude,
+        "start_time": start_time,
+        "end_time": end_time,
+        "tweet.fields": tweet_fields,
+        "expansions": expansions,
+        "media.fields": media_fields,
+        "poll.fields": poll_fields,
+        "user.fields": user_fields,
+        "place.fields": place_fields,
+    })
+
     # Make request to Twitter API
     url = f"{TWITTER_API_BASE}/users/{id}/tweets"
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = auth_headers(token)
     
-    print(f"Making request to: {url}")
-    print(f"With params: {params}")
-    
-    result = make_twitter_request(url, headers, params)
-    
-    # Debug the full response structure
-    print(f"Response structure: {list(result.keys())}")
+    logger.debug("Making request to: %s with params: %s", url, params)
     
+    result = await cached_twitter_get(url, headers, params, bucket_key="users/tweets")
+    if isinstance(result, Response):
+        return result
+
     # Check if public_metrics are included in the response
     if 'data' in result and len(result['data']) > 0:
         first_tweet = result['data'][0]
-        print(f"First tweet keys: {list(first_tweet.keys())}")
         has_metrics = 'public_metrics' in first_tweet
-        print(f"Retrieved {len(result['data'])} tweets. Public metrics included: {has_metrics}")
+        logger.info("Retrieved %d tweets. Public metrics included: %s", len(result['data']), has_metrics)
         if not has_metrics:
-            print("WARNING: public_metrics not included in tweet data. Make sure tweet.fields includes 'public_metrics'")
-    
-    return result
-
-# Function to analyze sentiment of a tweet using NLTK VADER
-def analyze_sentiment(text):
-    if not MODEL_LOADED:
-        return {
-            "scores": {"negative": 0.0, "neutral": 1.0, "positive": 0.0},
-            "sentiment": "neutral",
-            "confidence": 1.0
-        }
-    
-    # Get sentiment scores
+            logger.warning("public_metrics not included in tweet data. Make sure tweet.fields includes 'public_metrics'")
+
+    return ORJSONResponse(result)
+
+# Pre-cleaning for tweets before VADER: URLs carry no sentiment signal, and
+# long runs of repeated punctuation/emoticons trigger a known pathological
+# slowdown in VADER's tokenizer, so collapse them to at most three repeats
+URL_RE = re.compile(r"https?://\S+")
+REPEAT_RE = re.compile(r"([^\w\s])\1{3,}")
+
+def clean_tweet(text):
+    return REPEAT_RE.sub(r"\1\1\1", URL_RE.sub("", text))
+
+# Flat per-tweet scores used internally; response dicts are only built at
+# the serialization boundary
+Scores = collections.namedtuple("Scores", "neg neu pos compound")
+
+# VADER is deterministic, so identical tweets (clients re-polling the same
+# timeline) can reuse a cached score instead of re-tokenizing
+@lru_cache(maxsize=100_000)
+def _score_cached(text):
+    # Nothing left to score once URLs are stripped - skip VADER entirely
+    if not text or text.isspace():
+        return (0.0, 1.0, 0.0, 0.0)
+    # Single-pass tokenize + lexicon lookup when the text has none of the
+    # constructs VADER's rule engine cares about
+    simple = fast_sentiment.score_simple(text)
+    if simple is not None:
+        return simple
     scores = sia.polarity_scores(text)
-    
-    # Determine sentiment
-    if scores['compound'] >= 0.05:
-        sentiment = "positive"
-    elif scores['compound'] <= -0.05:
-        sentiment = "negative"
-    else:
-        sentiment = "neutral"
-    
-    # Format the result
-    result = {
-        "scores": {
-            "negative": scores['neg'],
-            "neutral": scores['neu'],
-            "positive": scores['pos']
-        },
-        "sentiment": sentiment,
-        "confidence": abs(scores['compound'])
-    }
-    
-    return result
+    return (scores['neg'], scores['neu'], scores['pos'], scores['compound'])
 
 # Add a new endpoint for sentiment analysis
 class SentimentRequest(BaseModel):
     tweets: List[str]
 
-class SentimentResponse(BaseModel):
-    overall: Dict[str, Any]
-    individual: List[Dict[str, Any]]
+async def _stream_sentiment(tweets, cleaned):
+    """Yield one NDJSON line per scored tweet, then a final overall line.
+
+    Keeps a running sum for the overall average so nothing beyond the
+    current tweet needs to stay in memory, and yields control to the event
+    loop between tweets.
+    """
+    sums = np.zeros(3, dtype=np.float64)
+    count = 0
+    for tweet, text in zip(tweets, cleaned):
+        neg_s, neu_s, pos_s, compound_s = _score_cached(text)
+        if compound_s >= 0.05:
+            sentiment = "positive"
+        elif compound_s <= -0.05:
+            sentiment = "negative"
+        else:
+            sentiment = "neutral"
+        sums += (neg_s, neu_s, pos_s)
+        count += 1
+        yield orjson.dumps({
+            "text": tweet,
+            "sentiment": sentiment,
+            "scores": {"negative": neg_s, "neutral": neu_s, "positive": pos_s}
+        }) + b"\n"
+        await asyncio.sleep(0)
+
+    if count:
+        avg = sums / count
+        overall = {
+            "sentiment": ("negative", "neutral", "positive")[int(avg.argmax())],
+            "scores": dict(zip(("negative", "neutral", "positive"), avg.tolist()))
+        }
+    else:
+        overall = {"sentiment": "neutral", "scores": {"negative": 0, "neutral": 1, "positive": 0}}
+    yield orjson.dumps({"overall": overall}) + b"\n"
+
+def _score_batch_sync(cleaned):
+    """Synchronous batch scoring, run off the event loop via to_thread.
 
-@app.post("/analyze/sentiment", response_model=SentimentResponse)
-async def analyze_tweets_sentiment(request: SentimentRequest):
+    Returns (scores_list, scores_stack); the stack is None when any tweet
+    was re-scored individually, in which case the caller rebuilds it.
+    """
+    if fast_sentiment.ready():
+        neg, neu, pos, compound, full_idx = fast_sentiment.score_tweets(cleaned)
+    else:
+        neg, neu, pos, compound, full_idx = fast_sentiment.score_tweets_numpy(cleaned)
+    scores_list = [Scores(float(neg[i]), float(neu[i]), float(pos[i]), float(compound[i]))
+                   for i in range(len(cleaned))]
+    for i in full_idx:
+        if cleaned[i].strip():
+            scores_list[i] = Scores(*_score_cached(cleaned[i]))
+    scores_stack = None if full_idx else np.stack((neg, neu, pos), axis=1)
+    return scores_list, scores_stack
+
+@app.post("/analyze/sentiment")
+async def analyze_tweets_sentiment(request: SentimentRequest, stream: bool = False):
     """
     Analyze the sentiment of a list of tweets
     """
-    global MODEL_LOADED
-    
-    if not MODEL_LOADED:
-        return {
-            "overall": {"sentiment": "neutral", "scores": {"negative": 0, "neutral": 1, "positive": 0}},
-            "individual": [{"text": "Model still loading...", "sentiment": "neutral", "scores": {"negative": 0, "neutral": 1, "positive": 0}}]
-        }
-    
-    print(f"Analyzing sentiment for {len(request.tweets)} tweets")
-    
-    # Analyze each tweet individually
-    individual_results = []
-    for tweet in request.tweets:
-        result = analyze_sentiment(tweet)
-        individual_results.append({
+    logger.info("Analyzing sentiment for %d tweets", len(request.tweets))
+
+    # Analyze the batch in one JIT-compiled pass when numba is available,
+    # otherwise fall back to per-tweet VADER
+    cleaned = [clean_tweet(t) for t in request.tweets]
+
+    # Very large batches can opt into NDJSON streaming (?stream=true) so
+    # results go out as they are scored instead of building the full list
+    if stream:
+        return StreamingResponse(_stream_sentiment(request.tweets, cleaned),
+                                 media_type="application/x-ndjson")
+
+    # Re-analyzed timelines repeat many tweets, so score each distinct
+    # cleaned text once and fan the results back out afterwards
+    unique = list(dict.fromkeys(cleaned))
+
+    # Score into a list of Scores tuples; dicts are only materialized once
+    # at the response boundary
+    unique_scores = []
+    scores_stack = None
+    if (unique and not fast_sentiment.ready()
+            and len(unique) >= SENTIMENT_POOL_THRESHOLD):
+        # Large batch without the numba kernel: fan chunks out across the
+        # worker processes so scoring uses every core. Size chunks to the
+        # worker count (capped at SENTIMENT_POOL_CHUNK) so batches just over
+        # the threshold still spread across all workers.
+        loop = asyncio.get_running_loop()
+        chunk_size = min(SENTIMENT_POOL_CHUNK,
+                         -(-len(unique) // (os.cpu_count() or 1)))
+        chunks = [unique[i:i + chunk_size]
+                  for i in range(0, len(unique), chunk_size)]
+        chunk_scores = await asyncio.gather(
+            *[loop.run_in_executor(app.state.pool, _score_chunk, c) for c in chunks])
+        unique_scores = [Scores(*s) for chunk in chunk_scores for s in chunk]
+    elif unique:
+        # CPU-bound scoring (numba kernel or the NumPy/VADER path) runs in
+        # a worker thread so concurrent requests keep flowing
+        unique_scores, scores_stack = await asyncio.to_thread(_score_batch_sync, unique)
+
+    if len(unique) == len(cleaned):
+        scores_list = unique_scores
+    else:
+        # The stack only covers unique texts; drop it so the average below
+        # is rebuilt over the fanned-out list
+        scored = dict(zip(unique, unique_scores))
+        scores_list = [scored[c] for c in cleaned]
+        scores_stack = None
+
+    individual_results = [
+        {
             "text": tweet,
-            "sentiment": result["sentiment"],
-            "scores": result["scores"]
-        })
-    
+            "sentiment": ("positive" if s.compound >= 0.05
+                          else "negative" if s.compound <= -0.05
+                          else "neutral"),
+            "scores": {"negative": s.neg, "neutral": s.neu, "positive": s.pos}
+        }
+        for tweet, s in zip(request.tweets, scores_list)
+    ]
+
     # Calculate overall sentiment
-    if not individual_results:
+    if not scores_list:
         overall = {"sentiment": "neutral", "scores": {"negative": 0, "neutral": 1, "positive": 0}}
     else:
-        # Average the scores across all tweets
-        avg_scores = {
-            "negative": sum(r["scores"]["negative"] for r in individual_results) / len(individual_results),
-            "neutral": sum(r["scores"]["neutral"] for r in individual_results) / len(individual_results),
-            "positive": sum(r["scores"]["positive"] for r in individual_results) / len(individual_results)
-        }
-        
-        # Determine overall sentiment
-        overall_sentiment = max(avg_scores, key=avg_scores.get)
-        
+        # Average the scores across all tweets in one vectorized reduction
+        if scores_stack is None:
+            scores_stack = np.array(scores_list, dtype=np.float32)[:, :3]
+        avg = scores_stack.mean(axis=0)
+        avg_scores = dict(zip(("negative", "neutral", "positive"), avg.tolist()))
+
         overall = {
-            "sentiment": overall_sentiment,
+            "sentiment": ("negative", "neutral", "positive")[int(avg.argmax())],
             "scores": avg_scores
         }
-    
-    return {
+
+    return ORJSONResponse({
         "overall": overall,
         "individual": individual_results
-    }
+    })
 
 @app.get("/health")
 async def health_check():
     """
     Simple health check endpoint
     """
-    return {"status": "ok", "model_loaded": MODEL_LOADED}
+    return {"status": "ok", "model_loaded": True}
 
 # Load environment variables
 load_dotenv()
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY", "")
 
+# One async client for Perplexity, created at import: the per-call OpenAI()
+# construction opened a fresh connection pool (and a TLS handshake) on every
+# analysis request
+PERPLEXITY_CLIENT = (
+    AsyncOpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai")
+    if PERPLEXITY_API_KEY else None
+)
+
+# Longest we'll hold up an AI analysis waiting for Perplexity context
+PERPLEXITY_TIMEOUT = float(os.getenv("PERPLEXITY_TIMEOUT", "2.0"))
+
+# Cap on total post characters sent to the LLMs - oversized prompts dominate
+# response latency (and cost) without improving the analysis
+POSTS_CHAR_BUDGET = 12_000
+
+def _cap_posts(posts):
+    """Truncate posts to a fair per-post share when over the prompt budget."""
+    if sum(len(p) for p in posts) <= POSTS_CHAR_BUDGET:
+        return posts
+    per_post = max(POSTS_CHAR_BUDGET // len(posts), 1)
+    return [p[:per_post] for p in posts]
+
 # Update the Perplexity API call function to use OpenAI client and refer to "posts"
-def get_perplexity_context(posts):
+async def get_perplexity_context(posts):
     """Get concise additional context about posts using Perplexity API"""
-    if not PERPLEXITY_API_KEY:
-        print("WARNING: PERPLEXITY_API_KEY not set")
+    if PERPLEXITY_CLIENT is None:
+        logger.warning("PERPLEXITY_API_KEY not set")
         return None
-    
+
     try:
         # Format posts for the prompt without numbering
-        posts_text = "\n\n".join(posts)
-        
+        posts_text = "\n\n".join(_cap_posts(posts))
+
         # Create the prompt requesting concise context
         prompt = f"Provide very concise insights about these posts (2-3 sentences max):\n\n{posts_text}"
-        
-        # Initialize the OpenAI client
-        client = OpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai")
-        
-        # Call the Perplexity API with the OpenAI client
-        response = client.chat.completions.create(
+
+        # Call the Perplexity API with the shared async client
+        response = await PERPLEXITY_CLIENT.chat.completions.create(
             model="sonar-pro",
             messages=[
                 {"role": "system", "content": "You are a helpful assistant that provides extremely concise context (2-3 sentences max) about social media posts."},
@@ -359,12 +605,98 @@ def get_perplexity_context(posts):
         return None
     
     except Exception as e:
-        print(f"Error calling Perplexity API: {e}")
+        logger.error("Error calling Perplexity API: %s", e)
         return None
 
+FIREWORKS_MODEL = "accounts/fireworks/models/llama-v3p1-405b-instruct"
+
+# Prompt templates hoisted out of the request path. These are deliberately
+# unindented: the old inline triple-quoted strings shipped ~20 spaces of
+# leading indentation on every line straight into the model, inflating
+# input tokens for no benefit.
+_ANALYSIS_PROMPT_FOCUS = """Provide a concise 3-4 sentence overview of these posts. Focus on:
+- The main themes or messaging
+- What makes them effective or ineffective
+- One specific suggestion for improvement
+
+Keep your response to 3-4 sentences total. Do not reference specific posts by number.
+"""
+
+_ANALYSIS_PROMPT_WITH_CTX = """Review these social media posts:
+
+{posts_text}
+
+Additional context about these posts:
+{context}
+
+""" + _ANALYSIS_PROMPT_FOCUS
+
+_ANALYSIS_PROMPT_NO_CTX = """Review these social media posts:
+
+{posts_text}
+
+""" + _ANALYSIS_PROMPT_FOCUS
+
+_CHAT_PROMPT = """You are an AI assistant specializing in social media analysis. You have access to the following recent posts from an organization:
+
+{posts_text}
+
+Chat history:
+{chat_history}
+
+User's question: {user_message}
+
+Please provide a helpful, informative response about these posts based on the user's question.
+"""
+
+def _sse_event(payload):
+    """Frame a payload as one SSE event, one data: line per text line.
+
+    A bare continuation line (no data: prefix) is silently dropped by
+    EventSource clients; framing every line keeps embedded newlines intact,
+    since the client rejoins multiple data lines with \\n.
+    """
+    return "".join(f"data: {line}\n" for line in payload.split("\n")) + "\n"
+
+async def _stream_fireworks(messages):
+    """Stream a Fireworks chat completion as server-sent events."""
+    try:
+        response = fireworks.client.ChatCompletion.acreate(
+            model=FIREWORKS_MODEL,
+            messages=messages,
+            max_tokens=1024,
+            temperature=0.7,
+            stream=True,
+        )
+        async for chunk in response:
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                yield _sse_event(delta)
+        yield "data: [DONE]\n\n"
+    except Exception as e:
+        logger.error("Error streaming from Fireworks AI: %s", e)
+        yield _sse_event(f"[ERROR] {e}")
+
+# Typed request bodies so pydantic-core validates in native code instead of
+# building a dict-of-Any; unknown keys from older clients are ignored
+class AIAnalyzeRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    tweets: List[str]  # Keep parameter name for compatibility
+    concise: bool = False
+    stream: bool = False
+
+class ChatRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    tweets: List[str]  # Keep parameter name for compatibility
+    chat_history: str = ""
+    user_message: str = ""
+    stream: bool = False
+
 # Update the analyze_tweets_with_ai function to use "posts" terminology
-@app.post("/analyze/tweets/ai", response_model=Dict[str, Any])
-async def analyze_posts_with_ai(request: Dict[str, Any]):
+@app.post("/analyze/tweets/ai")
+async def analyze_posts_with_ai(request: AIAnalyzeRequest):
     """
     Analyze social media posts using Fireworks AI LLaMA model with Perplexity context
     """
@@ -374,9 +706,9 @@ async def analyze_posts_with_ai(request: Dict[str, Any]):
             "analysis": "AI analysis is not available. Please configure a Fireworks API key."
         }
     
-    posts = request.get("tweets", [])  # Keep parameter name for compatibility
-    concise = request.get("concise", False)
-    
+    posts = request.tweets
+    concise = request.concise
+
     if not posts or len(posts) == 0:
         return {
             "error": "No posts provided",
@@ -384,71 +716,65 @@ async def analyze_posts_with_ai(request: Dict[str, Any]):
         }
     
     try:
-        # Get additional context from Perplexity API
-        context = get_perplexity_context(posts)
-        
+        # Kick off the Perplexity context fetch immediately, but bound how
+        # long we wait for it - the context is a nice-to-have appended to
+        # the prompt, not worth stalling the whole analysis for
+        ctx_task = asyncio.create_task(get_perplexity_context(posts))
+        done, pending = await asyncio.wait({ctx_task}, timeout=PERPLEXITY_TIMEOUT)
+        if ctx_task in done:
+            context = ctx_task.result()
+        else:
+            logger.warning("Perplexity context timed out after %.1fs, proceeding without it",
+                           PERPLEXITY_TIMEOUT)
+            ctx_task.cancel()
+            context = None
+
         # Format the posts for the prompt without numbering
-        posts_text = "\n\n".join(posts)
+        posts_text = "\n\n".join(_cap_posts(posts))
         
         # Create a more direct prompt focused on a concise overview without referencing specific posts
         if context:
-            prompt = f"""Review these social media posts:
-
-                    {posts_text}
-                    
-                    Additional context about these posts:
-                    {context}
-
-                    Provide a concise 3-4 sentence overview of these posts. Focus on:
-                    - The main themes or messaging
-                    - What makes them effective or ineffective
-                    - One specific suggestion for improvement
-                    
-                    Keep your response to 3-4 sentences total. Do not reference specific posts by number.
-                    """
+            prompt = _ANALYSIS_PROMPT_WITH_CTX.format(posts_text=posts_text, context=context)
         else:
-            prompt = f"""Review these social media posts:
+            prompt = _ANALYSIS_PROMPT_NO_CTX.format(posts_text=posts_text)
+        
+        messages = [
+            {"role": "system", "content": "You are an expert social media analyst who provides extremely concise, insightful overviews without referencing specific posts by number."},
+            {"role": "user", "content": prompt}
+        ]
 
-                    {posts_text}
+        # Stream tokens as they arrive when the client asks for it
+        if request.stream:
+            return StreamingResponse(_stream_fireworks(messages),
+                                     media_type="text/event-stream")
 
-                    Provide a concise 3-4 sentence overview of these posts. Focus on:
-                    - The main themes or messaging
-                    - What makes them effective or ineffective
-                    - One specific suggestion for improvement
-                    
-                    Keep your response to 3-4 sentences total. Do not reference specific posts by number.
-                    """
-        
         # Call the Fireworks AI API
-        response = fireworks.client.ChatCompletion.create(
-            model="accounts/fireworks/models/llama-v3p1-405b-instruct",
-            messages=[
-                {"role": "system", "content": "You are an expert social media analyst who provides extremely concise, insightful overviews without referencing specific posts by number."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await fireworks.client.ChatCompletion.acreate(
+            model=FIREWORKS_MODEL,
+            messages=messages,
             max_tokens=1024,
             temperature=0.7,
         )
-        
+
         # Extract the analysis from the response
         analysis = response.choices[0].message.content
-        
+
         return {
             "analysis": analysis,
             "context": context
         }
         
     except Exception as e:
-        print(f"Error in AI analysis: {e}")
+        logger.error("Error in AI analysis: %s", e)
         return {
             "error": str(e),
             "analysis": "An error occurred while analyzing the posts with AI."
         }
 
 # Update the chat endpoint to use "posts" terminology
-@app.post("/analyze/tweets/chat", response_model=Dict[str, Any])
+@app.post("/analyze/tweets/chat")
 async def chat_about_posts(
-    request: Dict[str, Any],
+    request: ChatRequest,
     token: str = Depends(verify_token)
 ):
     """
@@ -460,10 +786,10 @@ async def chat_about_posts(
             "response": "AI chat is not available. Please configure a Fireworks API key."
         }
     
-    posts = request.get("tweets", [])  # Keep parameter name for compatibility
-    chat_history = request.get("chat_history", "")
-    user_message = request.get("user_message", "")
-    
+    posts = request.tweets
+    chat_history = request.chat_history
+    user_message = request.user_message
+
     if not posts or not user_message:
         return {
             "error": "No posts or message provided",
@@ -471,42 +797,43 @@ async def chat_about_posts(
         }
     
     try:
-        # Format the posts for the prompt
-        posts_text = "\n\n".join([f"Post {i+1}: {post}" for i, post in enumerate(posts)])
+        # Format the posts for the prompt; generator keeps join from
+        # materializing an intermediate list
+        posts_text = "\n\n".join(f"Post {i+1}: {post}"
+                                 for i, post in enumerate(_cap_posts(posts)))
         
         # Create the prompt for the LLaMA model
-        prompt = f"""You are an AI assistant specializing in social media analysis. You have access to the following recent posts from an organization:
-
-            {posts_text}
-
-            Chat history:
-            {chat_history}
+        prompt = _CHAT_PROMPT.format(posts_text=posts_text,
+                                     chat_history=chat_history,
+                                     user_message=user_message)
+        
+        messages = [
+            {"role": "system", "content": "You are an AI assistant specializing in social media analysis."},
+            {"role": "user", "content": prompt}
+        ]
 
-            User's question: {user_message}
+        # Stream tokens as they arrive when the client asks for it
+        if request.stream:
+            return StreamingResponse(_stream_fireworks(messages),
+                                     media_type="text/event-stream")
 
-            Please provide a helpful, informative response about these posts based on the user's question.
-            """
-        
         # Call the Fireworks AI API
-        response = fireworks.client.ChatCompletion.create(
-            model="accounts/fireworks/models/llama-v3p1-405b-instruct",
-            messages=[
-                {"role": "system", "content": "You are an AI assistant specializing in social media analysis."},
-                {"role": "user", "content": prompt}
-            ],
+        response = await fireworks.client.ChatCompletion.acreate(
+            model=FIREWORKS_MODEL,
+            messages=messages,
             max_tokens=1024,
             temperature=0.7,
         )
-        
+
         # Extract the response from the API
         ai_response = response.choices[0].message.content
-        
+
         return {
             "response": ai_response
         }
         
     except Exception as e:
-        print(f"Error calling Fireworks AI for chat: {e}")
+        logger.error("Error calling Fireworks AI for chat: %s", e)
         return {
             "error": str(e),
             "response": "An error occurred while processing your question."
@@ -525,39 +852,30 @@ async def get_tweet_liking_users(
     """
     Get users who liked a tweet using the Twitter API
     """
-    print(f"Fetching users who liked tweet ID: {id}")
+    logger.info("Fetching users who liked tweet ID: %s", id)
     
     # Build query parameters
-    params = {}
-    if max_results:
-        params["max_results"] = max_results
-    if pagination_token:
-        params["pagination_token"] = pagination_token
-    if user_fields:
-        params["user.fields"] = ",".join(user_fields)
-    if expansions:
-        params["expansions"] = ",".join(expansions)
-    if tweet_fields:
-        params["tweet.fields"] = ",".join(tweet_fields)
-    
+    params = build_params({
+        "max_results": max_results,
+        "pagination_token": pagination_token,
+        "user.fields": user_fields,
+        "expansions": expansions,
+        "tweet.fields": tweet_fields,
+    })
+
     # Make request to Twitter API
     url = f"{TWITTER_API_BASE}/tweets/{id}/liking_users"
-    headers = {"Authorization": f"Bearer {token}"}
-    
-    print(f"Making request to: {url}")
-    print(f"With params: {params}")
+    headers = auth_headers(token)
     
-    result = make_twitter_request(url, headers, params)
-    
-    # Debug the response structure
-    print(f"Liking users response structure: {list(result.keys())}")
+    logger.debug("Making request to: %s with params: %s", url, params)
     
+    result = await make_twitter_request(url, headers, params, bucket_key="tweets/liking_users")
+
     # Check if we have data
     if 'data' in result:
-        like_count = len(result['data'])
-        print(f"Retrieved {like_count} users who liked the tweet")
+        logger.info("Retrieved %d users who liked the tweet", len(result['data']))
     else:
-        print(f"No users found who liked the tweet. Response: {result}")
+        logger.debug("No users found who liked the tweet. Response: %s", result)
     
     return result
 
@@ -570,15 +888,15 @@ async def check_token_permissions(token: str = Depends(verify_token)):
     try:
         # Make a request to the Twitter API to check token permissions
         url = f"{TWITTER_API_BASE}/users/me"
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        response = requests.get(url, headers=headers)
+        headers = auth_headers(token)
         
+        response = await app.state.http.get(url, headers=headers)
+
         if response.status_code == 200:
             return {
                 "status": "ok",
                 "message": "Token is valid",
-                "data": response.json()
+                "data": orjson.loads(response.content)
             }
         else:
             return {
@@ -594,4 +912,8 @@ async def check_token_permissions(token: str = Depends(verify_token)):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    # uvloop + httptools come with uvicorn[standard]; per-worker clients and
+    # pools are created in the startup events, so multiple workers are safe
+    uvicorn.run("main:app", host="0.0.0.0", port=8000,
+                loop="uvloop", http="httptools", workers=os.cpu_count())
\ No newline at end of file